@@ -1,26 +1,104 @@
-import os
 import sys
+
+# inotify_simple does `from select import poll` at import time, and eventlet's patched
+# select has no poll, so it has to load before monkey_patch(). It's required on Linux.
+if sys.platform.startswith("linux"):
+    from inotify_simple import INotify, flags as inotify_flags
+else:  # no inotify: tail by polling instead
+    INotify = None
+
+# patch blocking stdlib calls (sleep, sockets, threading) into greenlet-aware ones before anything else imports them
+import eventlet
+eventlet.monkey_patch()
+
+import atexit
+import os
 import time
-import json
-from threading import Lock, Thread
-from flask import Flask, render_template, jsonify, send_from_directory, request, redirect, url_for, session, flash, send_file
+import mmap
+import queue
+import signal
+import tempfile
+from functools import wraps
+from threading import Lock
+import orjson
+from eventlet import tpool
+from eventlet.green import select as green_select
+from flask import Flask, abort, make_response, render_template, jsonify, send_from_directory, request, redirect, url_for, session, flash, send_file
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO, emit, join_room, leave_room, disconnect
-from werkzeug.security import check_password_hash
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.security import check_password_hash, safe_join
 from pathlib import Path
+from urllib.parse import quote
 
 LOG_DIR = "/var/log"
 ALLOWED = {".log", ""}
+LOGIN_BURST = 5  # login attempts an IP may make back to back
+LOGIN_RATE = 1.0  # attempts regained per second
+LIST_CACHE_TTL = 2.0  # seconds a /var/log listing is reused
+TAIL_MAP_WINDOW = 1 << 20  # initial bytes mapped at the end of a large log by send_last_lines
+LOG_BATCH_SIZE = 1000  # max lines per 'log_batch' event when sending a whole file
+
+if INotify is not None:
+    TAIL_ROTATE_FLAGS = inotify_flags.MOVE_SELF | inotify_flags.DELETE_SELF
+    TAIL_WATCH_FLAGS = inotify_flags.MODIFY | TAIL_ROTATE_FLAGS
 
 # location of .auth.env created earlier
 AUTH_ENV = Path(__file__).parent / ".auth.env"
 FOLDER_STORE = Path(__file__).parent / ".folders.json"
+# when set (e.g. "/internal-static/"), static files are handed to nginx via X-Accel-Redirect
+STATIC_ACCEL_PREFIX = os.environ.get("STATIC_ACCEL_PREFIX", "")
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (jsonify, request.json)."""
+
+    def dumps(self, obj, **kwargs):
+        # orjson only does compact or 2-space output; any other option goes to the stdlib provider
+        extra = dict(kwargs)
+        indent = extra.pop("indent", None)
+        separators = extra.pop("separators", None)
+        if extra or indent not in (None, 2) or separators not in (None, (",", ":")):
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        if indent == 2:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode("utf-8")
 
-app = Flask(__name__, static_folder="static", template_folder="templates")
+    def loads(self, s, **kwargs):
+        if kwargs:
+            # e.g. object_hook from the session's TaggedJSONSerializer
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+class _OrjsonCodec:
+    """json-module stand-in for python-socketio: calls orjson directly, no app context or key sorting."""
+
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+# no built-in static route: it would shadow the login-gated static_files() below
+app = Flask(__name__, static_folder=None, template_folder="templates")
+app.json = OrjsonProvider(app)
 # set a strong random secret key (or read from env)
 app.config["SECRET_KEY"] = os.environ.get("FLASK_SECRET", "replace-with-a-random-secret-please-change")
-socketio = SocketIO(app, async_mode="eventlet")
+if os.environ.get("BEHIND_PROXY"):
+    # trust X-Forwarded-For from the reverse proxy so request.remote_addr is the client
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1)
+# packets skip app.json: Flask-SocketIO would push an app context around every encode/decode
+socketio = SocketIO(app, async_mode="eventlet", json=_OrjsonCodec)
 thread_lock = Lock()
-tail_threads = {}  # { room: {"thread": Thread, "stop": bool, "file": str} }
+_login_buckets = {}  # { ip: (tokens, last refill time) }
+_login_lock = Lock()
+_list_cache = None
+_list_ts = 0.0
+# { room: {"task": background task, "stop": bool, "file": str, "clients": set of sids,
+#          "offset": bytes of the file emitted so far, "emit_lock": held while emitting / advancing offset} }
+tail_threads = {}
 
 # load credentials
 def load_auth():
@@ -37,54 +115,143 @@ def load_auth():
 AUTH_USER, AUTH_PW_HASH = load_auth()
 
 def login_required(fn):
-    from functools import wraps
+    auth_user = AUTH_USER  # loaded above, before any route is decorated
     @wraps(fn)
     def wrapper(*a, **kw):
-        if session.get("logged_in") and session.get("user") == AUTH_USER:
+        sess = session._get_current_object()  # resolve the context-local proxy once
+        if sess.get("logged_in") and sess.get("user") == auth_user:
             return fn(*a, **kw)
         return redirect(url_for("login", next=request.path))
     return wrapper
 
 def list_log_files():
+    # the UI polls this, so keep the listing for LIST_CACHE_TTL seconds
+    global _list_cache, _list_ts
+    now = time.monotonic()
+    if _list_cache is not None and now - _list_ts < LIST_CACHE_TTL:
+        return list(_list_cache)
     files = []
     try:
-        for entry in os.listdir(LOG_DIR):
-            path = os.path.join(LOG_DIR, entry)
-            if os.path.isfile(path):
-                _, ext = os.path.splitext(entry)
-                if ext in ALLOWED:
-                    files.append(entry)
+        with os.scandir(LOG_DIR) as it:
+            for entry in it:
+                if entry.is_file():
+                    name = entry.name
+                    dot = name.rfind(".")
+                    ext = name[dot:] if dot > 0 else ""  # leading dot isn't an extension, as in splitext
+                    if ext in ALLOWED:
+                        files.append(name)
     except Exception as e:
         print("Error listing logs:", e, file=sys.stderr)
     files.sort()
-    return files
+    _list_cache = files
+    _list_ts = now
+    return list(files)
 
 # ------------------------
 # Folder (virtual) helpers
 # ------------------------
+_folders_cache = None
+_folders_mtime = 0
+_folders_lock = Lock()
+_folders_write_queue = queue.Queue()
+_folders_version = 0  # bumped by every save
+_folders_saved = 0  # version last written to FOLDER_STORE
+_UMASK = os.umask(0)  # read once at import, while still single-threaded
+os.umask(_UMASK)
+
 def _load_folders():
-    try:
-        if not FOLDER_STORE.exists():
+    # parsed store is cached and only re-read when the file's mtime changes.
+    # folders are sets in memory and sorted lists on disk / over the API
+    global _folders_cache, _folders_mtime
+    with _folders_lock:
+        try:
+            if not FOLDER_STORE.exists():
+                # a save may still be waiting on the background writer
+                return {k: set(v) for k, v in (_folders_cache or {}).items()}
+            mtime = FOLDER_STORE.stat().st_mtime_ns
+            if _folders_cache is None or mtime != _folders_mtime:
+                with open(FOLDER_STORE, "rb") as fh:
+                    data = orjson.loads(fh.read()) or {}
+                _folders_cache = {k: set(v) for k, v in data.items()}
+                _folders_mtime = mtime
+            return {k: set(v) for k, v in _folders_cache.items()}
+        except Exception:
             return {}
-        with open(FOLDER_STORE, "r") as fh:
-            data = json.load(fh) or {}
-            return {k: list(v) for k, v in data.items()}
-    except Exception:
-        return {}
 
 def _save_folders(data):
+    # update the cache right away; the file itself is written by _folder_writer
+    global _folders_cache, _folders_version
+    with _folders_lock:
+        _folders_cache = {k: set(v) for k, v in data.items()}
+        _folders_version += 1
+        _folders_write_queue.put((_folders_version, {k: sorted(v) for k, v in data.items()}))
+    return True
+
+def _write_folder_file(data):
+    # unique temp name, so the exit flush can't collide with a write still in flight
+    fd, tmp = tempfile.mkstemp(dir=FOLDER_STORE.parent, prefix=FOLDER_STORE.name + ".", suffix=".tmp")
+    # mkstemp creates 0600; keep the mode a plain open() would give (or the existing file's)
     try:
-        with open(FOLDER_STORE, "w") as fh:
-            json.dump(data, fh, indent=2)
-        return True
-    except Exception:
-        return False
+        mode = FOLDER_STORE.stat().st_mode & 0o777
+    except OSError:
+        mode = 0o666 & ~_UMASK
+    os.fchmod(fd, mode)
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    return tmp
+
+def _commit_folder_file(tmp, version):
+    global _folders_mtime, _folders_saved
+    with _folders_lock:
+        if version < _folders_saved:
+            os.unlink(tmp)  # a newer state is already on disk
+            return
+        os.replace(tmp, FOLDER_STORE)
+        _folders_mtime = FOLDER_STORE.stat().st_mtime_ns
+        _folders_saved = version
+
+def _folder_writer():
+    while True:
+        version, data = _folders_write_queue.get()
+        # only the newest queued state matters
+        while True:
+            try:
+                version, data = _folders_write_queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            # eventlet can't make file I/O cooperative, so write on a native thread to keep the hub free
+            tmp = tpool.execute(_write_folder_file, data)
+            _commit_folder_file(tmp, version)
+        except Exception as e:
+            print("Error saving folders:", e, file=sys.stderr)
+
+def _exit_on_sigterm():
+    # atexit hooks don't run on SIGTERM (systemd/docker stop); turn it into a normal exit
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+@atexit.register
+def _flush_folders():
+    # the writer task dies with the process; persist whatever it hasn't written yet
+    with _folders_lock:
+        if _folders_saved == _folders_version:
+            return
+        version = _folders_version
+        data = {k: sorted(v) for k, v in (_folders_cache or {}).items()}
+    try:
+        _commit_folder_file(_write_folder_file(data), version)
+    except Exception as e:
+        print("Error saving folders:", e, file=sys.stderr)
+
+socketio.start_background_task(_folder_writer)
 
 def _sanitize_filename(fname):
-    # only allow basename (no slashes) and allowed extension
-    if os.path.basename(fname) != fname:
+    # only allow a plain name (no path separators / NUL) with an allowed extension
+    if not fname or "/" in fname or "\\" in fname or "\x00" in fname or fname in (".", ".."):
         return None
-    _, ext = os.path.splitext(fname)
+    # same extension rule as list_log_files, so everything listed can be moved
+    dot = fname.rfind(".")
+    ext = fname[dot:] if dot > 0 else ""
     if ext not in ALLOWED:
         return None
     return fname
@@ -92,58 +259,141 @@ def _sanitize_filename(fname):
 # ------------------------
 # Log sending / tailing helpers
 # ------------------------
-def send_last_lines(filename, room, n=200):
+def _tail_start(buf, n, whole_file):
     """
-    Send last `n` lines to the room. If n is None, send the entire file.
-    Emits 'log_line' events (same format your frontend already listens to).
+    Index in `buf` where its last `n` lines begin, walking backwards with rfind.
+    Returns -1 if `buf` is only the end of the file and holds fewer than n full lines.
+    """
+    # a trailing newline doesn't start a line
+    pos = len(buf) - 1 if buf[len(buf) - 1] == 0x0A else len(buf)
+    for _ in range(n):
+        pos = buf.rfind(b"\n", 0, pos)
+        if pos < 0:
+            return 0 if whole_file else -1
+    return pos + 1
+
+def send_last_lines(fh, filename, room, n=200, start=0, end=None):
+    """
+    Send last `n` lines of the open binary file `fh` to the room. If n is None, send the file
+    from byte `start` up to byte `end` (default: EOF).
+    Emits 'log_batch' events carrying a list of lines, the same event the live tail uses.
+    Leaves `fh` positioned right after the last byte sent so a tailer can pick up from there.
     """
-    path = os.path.join(LOG_DIR, filename)
     try:
         if n is None:
-            # Send entire file from start
-            with open(path, "r", errors="replace") as fh:
-                for line in fh:
-                    if not line.endswith("\n"):
-                        socketio.emit("log_line", {"file": filename, "line": line + "\n"}, room=room)
-                    else:
-                        socketio.emit("log_line", {"file": filename, "line": line}, room=room)
+            # Send the file from `start`, LOG_BATCH_SIZE lines per event
+            batch = []
+            fh.seek(start)
+            remaining = end - start if end is not None else None
+            for line in fh:
+                if remaining is not None:
+                    if remaining <= 0:
+                        break
+                    line = line[:remaining]
+                    remaining -= len(line)
+                line = line.decode("utf-8", errors="replace")
+                batch.append(line if line.endswith("\n") else line + "\n")
+                if len(batch) >= LOG_BATCH_SIZE:
+                    socketio.emit("log_batch", {"file": filename, "lines": batch}, room=room)
+                    batch = []
+            if batch:
+                socketio.emit("log_batch", {"file": filename, "lines": batch}, room=room)
             return
 
-        with open(path, "r", errors="replace") as fh:
-            fh.seek(0, os.SEEK_END)
-            size = fh.tell()
-            block = 4096
-            data = ""
-            while len(data.splitlines()) <= n and size > 0:
-                size = max(0, size - block)
-                fh.seek(size)
-                data = fh.read()
-            lines = data.splitlines()[-n:]
-            for line in lines:
-                socketio.emit("log_line", {"file": filename, "line": line + "\n"}, room=room)
+        fd = fh.fileno()
+        size = os.fstat(fd).st_size
+        if size == 0:
+            return
+        if size <= TAIL_MAP_WINDOW:
+            # small file: a plain read, nothing mapped
+            buf = os.pread(fd, size, 0)
+            lines = buf[_tail_start(buf, n, True):].splitlines()
+        else:
+            # Map only a bounded window at the end of the file, growing it until it holds n lines.
+            # If the file is truncated (logrotate copytruncate) while mapped, touching pages past
+            # the new EOF raises SIGBUS and kills the process; keeping the window small and the
+            # mapping short-lived narrows that race but cannot close it.
+            window = TAIL_MAP_WINDOW
+            while True:
+                offset = max(0, size - window) // mmap.ALLOCATIONGRANULARITY * mmap.ALLOCATIONGRANULARITY
+                mm = mmap.mmap(fd, size - offset, access=mmap.ACCESS_READ, offset=offset)
+                try:
+                    start = _tail_start(mm, n, offset == 0)
+                    if start >= 0:
+                        lines = mm[start:].splitlines()
+                        break
+                finally:
+                    mm.close()
+                window *= 4
+        fh.seek(size)
+        lines_list = [line.decode("utf-8", errors="replace") + "\n" for line in lines]
+        socketio.emit("log_batch", {"file": filename, "lines": lines_list}, room=room)
     except Exception as e:
         socketio.emit("log_error", {"file": filename, "error": str(e)}, room=room)
 
-def tail_file_background(filename, room):
+def _emit_tail_lines(filename, room, lines):
+    if lines:
+        lines = [line.decode("utf-8", errors="replace") for line in lines]
+        socketio.emit("log_batch", {"file": filename, "lines": lines}, room=room)
+
+def _tail_stopped(room, info):
+    with thread_lock:
+        return tail_threads.get(room) is not info or info["stop"]
+
+def tail_file_background(fh, filename, room, info):
+    """
+    Follow the open binary file `fh` from its current position, emitting new lines to the room.
+    Runs until `info` (this tailer's tail_threads entry) is stopped or replaced.
+    Takes ownership of `fh` and closes it when the tail stops.
+    """
     path = os.path.join(LOG_DIR, filename)
+    inotify = INotify() if INotify is not None else None
+    pending = b""  # trailing partial line, held until its newline arrives
     try:
-        with open(path, "r", errors="replace") as fh:
-            fh.seek(0, os.SEEK_END)
-            while True:
-                with thread_lock:
-                    info = tail_threads.get(room)
-                    if not info or info.get("stop"):
-                        break
-                line = fh.readline()
-                if not line:
-                    time.sleep(0.2)
-                    continue
-                socketio.emit("log_line", {"file": filename, "line": line}, room=room)
+        wd = inotify.add_watch(path, TAIL_WATCH_FLAGS) if inotify is not None else None
+        while not _tail_stopped(room, info):
+            data = fh.read()
+            if data:
+                lines = (pending + data).splitlines(keepends=True)
+                pending = b"" if lines[-1].endswith(b"\n") else lines.pop()
+                with info["emit_lock"]:
+                    _emit_tail_lines(filename, room, lines)
+                    info["offset"] = fh.tell() - len(pending)
+            if inotify is None:
+                socketio.sleep(0.2)
+                continue
+            # wait on the inotify fd through eventlet so the hub keeps running other greenlets
+            ready, _, _ = green_select.select([inotify.fileno()], [], [], 1.0)
+            if not ready:
+                continue
+            events = inotify.read(timeout=0)
+            if any(ev.mask & TAIL_ROTATE_FLAGS for ev in events):
+                # file was rotated away: flush what's left of the old one, then follow the new one
+                with info["emit_lock"]:
+                    _emit_tail_lines(filename, room, (pending + fh.read()).splitlines(keepends=True))
+                    info["offset"] = 0  # nothing of the new file has been emitted yet
+                pending = b""
+                fh.close()
+                fh = None
+                try:
+                    inotify.rm_watch(wd)
+                except OSError:
+                    pass  # already dropped by the kernel (IN_IGNORED)
+                while not os.path.isfile(path):
+                    if _tail_stopped(room, info):
+                        return
+                    socketio.sleep(0.2)
+                fh = open(path, "rb")
+                wd = inotify.add_watch(path, TAIL_WATCH_FLAGS)
     except Exception as e:
         socketio.emit("log_error", {"file": filename, "error": str(e)}, room=room)
     finally:
+        if fh is not None:
+            fh.close()
+        if inotify is not None:
+            inotify.close()
         with thread_lock:
-            if room in tail_threads:
+            if tail_threads.get(room) is info:
                 tail_threads.pop(room, None)
 
 # ------------------------
@@ -154,9 +404,31 @@ def tail_file_background(filename, room):
 def index():
     return render_template("index.html")
 
+def _login_allowed(ip):
+    """Token bucket per client IP: LOGIN_BURST attempts, refilled at LOGIN_RATE per second."""
+    now = time.monotonic()
+    with _login_lock:
+        tokens, last = _login_buckets.get(ip, (LOGIN_BURST, now))
+        tokens = min(LOGIN_BURST, tokens + (now - last) * LOGIN_RATE)
+        if tokens < 1:
+            _login_buckets[ip] = (tokens, now)
+            return False
+        _login_buckets[ip] = (tokens - 1, now)
+        if len(_login_buckets) > 10000:
+            # forget clients whose bucket has refilled anyway
+            for k, (t, ts) in list(_login_buckets.items()):
+                if t + (now - ts) * LOGIN_RATE >= LOGIN_BURST:
+                    del _login_buckets[k]
+        return True
+
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
+        if session.get("logged_in") and session.get("user") == AUTH_USER:
+            return redirect(request.args.get("next") or url_for("index"))
+        if not _login_allowed(request.remote_addr):
+            flash("Too many login attempts, try again shortly", "error")
+            return render_template("login.html"), 429
         user = request.form.get("username", "")
         pw = request.form.get("password", "")
         if user == AUTH_USER and check_password_hash(AUTH_PW_HASH, pw):
@@ -177,18 +449,26 @@ def logout():
 @login_required
 def logs_list():
     files = list_log_files()
-    folders = _load_folders()
-    for k in list(folders.keys()):
-        folders[k] = [f for f in folders[k] if f in files]
+    file_set = set(files)
+    folders = {}
     assigned = set()
-    for v in folders.values():
-        assigned.update(v)
+    for k, v in _load_folders().items():
+        kept = v & file_set
+        folders[k] = sorted(kept)
+        assigned.update(kept)
     unsorted = [f for f in files if f not in assigned]
     return jsonify({"folders": folders, "unsorted": unsorted})
 
 @app.route("/static/<path:filename>")
 @login_required
 def static_files(filename):
+    if STATIC_ACCEL_PREFIX:
+        # auth is checked here; nginx serves the bytes from its internal location
+        if safe_join("static", filename) is None:
+            abort(404)
+        response = make_response("")
+        response.headers["X-Accel-Redirect"] = STATIC_ACCEL_PREFIX.rstrip("/") + "/" + quote(filename)
+        return response
     return send_from_directory("static", filename)
 
 # 🔽 Download log file
@@ -208,7 +488,7 @@ def download_log(filename):
 @login_required
 def folders_list():
     folders = _load_folders()
-    return jsonify(folders)
+    return jsonify({k: sorted(v) for k, v in folders.items()})
 
 @app.route("/folders/create", methods=["POST"])
 @login_required
@@ -219,7 +499,7 @@ def folders_create():
     folders = _load_folders()
     if name in folders:
         return jsonify({"error": "exists"}), 400
-    folders[name] = []
+    folders[name] = set()
     _save_folders(folders)
     return jsonify({"ok": True})
 
@@ -247,14 +527,12 @@ def folders_move():
     if not os.path.isfile(path):
         return jsonify({"error": "file not found"}), 404
     folders = _load_folders()
-    for k in list(folders.keys()):
-        if file in folders[k]:
-            folders[k].remove(file)
+    if target and target not in folders:
+        return jsonify({"error": "target folder not found"}), 404
+    for v in folders.values():
+        v.discard(file)
     if target:
-        if target not in folders:
-            return jsonify({"error": "target folder not found"}), 404
-        if file not in folders[target]:
-            folders[target].append(file)
+        folders[target].add(file)
     _save_folders(folders)
     return jsonify({"ok": True})
 
@@ -285,19 +563,54 @@ def on_join(data):
     if not filename:
         return
     room = filename
-    join_room(room)
     emit("joined", {"file": filename})
 
-    send_last_lines(filename, room, n=None)
+    try:
+        fh = open(os.path.join(LOG_DIR, filename), "rb")
+    except OSError as e:
+        emit("log_error", {"file": filename, "error": str(e)})
+        return
+    # one tailer per file, shared by every client in the room
+    with thread_lock:
+        info = tail_threads.get(room)
+        if info and info["stop"]:
+            info = None
+    if info is not None:
+        # history goes to the newcomer only, and only up to the byte offset the tailer has emitted.
+        # The room is joined under the tailer's emit lock once that offset is reached, so every
+        # line arrives exactly once: either in the history or from the tailer.
+        try:
+            pos = 0
+            while True:
+                with info["emit_lock"]:
+                    end = info["offset"]
+                    if pos >= end:
+                        join_room(room)
+                        break
+                send_last_lines(fh, filename, request.sid, n=None, start=pos, end=end)
+                pos = end
+        finally:
+            fh.close()
+        with thread_lock:
+            info["clients"].add(request.sid)
+        return
 
+    send_last_lines(fh, filename, request.sid, n=None)
+    join_room(room)
     with thread_lock:
-        old = tail_threads.get(room)
-        if old:
-            old["stop"] = True
-        tail_threads[room] = {"thread": None, "stop": False, "file": filename}
-        thread = Thread(target=tail_file_background, args=(filename, room), daemon=True)
-        tail_threads[room]["thread"] = thread
-        thread.start()
+        info = {"task": None, "stop": False, "file": filename, "clients": {request.sid},
+                "offset": fh.tell(), "emit_lock": Lock()}
+        tail_threads[room] = info
+        # the first subscriber's handle carries on as the live tail, resuming where the send stopped
+        info["task"] = socketio.start_background_task(tail_file_background, fh, filename, room, info)
+
+def _tail_unsubscribe(room, sid):
+    # caller holds thread_lock; the tailer stops once its last client is gone
+    info = tail_threads.get(room)
+    if info:
+        info["clients"].discard(sid)
+        if not info["clients"]:
+            info["stop"] = True
 
 @socketio.on("leave")
 def on_leave(data):
@@ -307,16 +620,17 @@ def on_leave(data):
     room = filename
     leave_room(room)
     with thread_lock:
-        info = tail_threads.get(room)
-        if info:
-            info["stop"] = True
+        _tail_unsubscribe(room, request.sid)
 
 @socketio.on("disconnect")
 def on_disconnect():
-    pass
+    with thread_lock:
+        for room in list(tail_threads):
+            _tail_unsubscribe(room, request.sid)
 
 if __name__ == "__main__":
     host = "0.0.0.0"
     port = 5065
     print(f"Serving on http://{host}:{port}")
+    _exit_on_sigterm()
     socketio.run(app, host=host, port=port)